@@ -4,10 +4,25 @@ CRUD (Create, Read, Update, Delete) operations for the database.
 This module contains functions for interacting with the database models,
 separating the database logic from the API endpoint logic.
 """
+import time
+from collections import defaultdict
+from sqlalchemy import Row, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from . import models, schemas
 
+# --- Tag Cache ---
+
+# Tags change rarely, so the task -> tags mapping of the whole task_tags table
+# is cached as one snapshot for a short time: (expiry timestamp, mapping).
+# Tables with more than TAG_CACHE_MAXSIZE associations are not snapshotted;
+# the cached mapping is then None and callers query per request instead.
+TAG_CACHE_TTL = 60
+TAG_CACHE_MAXSIZE = 10_000
+tag_cache: Optional[Tuple[float, Optional[Dict[str, List[schemas.Tag]]]]] = None
+
 # --- Tag CRUD Operations ---
 
 def get_tag_by_name(db: Session, name: str) -> models.Tag | None:
@@ -23,51 +38,138 @@ def get_tag_by_name(db: Session, name: str) -> models.Tag | None:
     """
     return db.query(models.Tag).filter(models.Tag.name == name).first()
 
-def get_tags(db: Session, skip: int = 0, limit: int = 100) -> List[models.Tag]:
+def get_tags(db: Session, skip: int = 0, limit: int = 100) -> List[Row]:
     """
     Retrieves a list of tags from the database with pagination.
 
+    Only the tag columns are selected, so rows are returned without ORM
+    instrumentation.
+
     Args:
         db: The database session.
         skip: The number of records to skip.
         limit: The maximum number of records to return.
 
     Returns:
-        A list of Tag objects.
+        A list of rows with `id` and `name` attributes.
     """
-    return db.query(models.Tag).offset(skip).limit(limit).all()
+    return db.execute(
+        select(models.Tag.id, models.Tag.name).offset(skip).limit(limit)
+    ).all()
 
-def create_tag(db: Session, tag: schemas.TagCreate) -> models.Tag:
+def create_tag(db: Session, tag: schemas.TagCreate) -> schemas.Tag | None:
     """
     Creates a new tag in the database.
 
+    On PostgreSQL and SQLite the existence check and the insert are done in a
+    single `INSERT ... ON CONFLICT (name) DO NOTHING RETURNING` statement.
+    Other databases insert directly and treat a unique constraint violation
+    as a duplicate. Either way there is no window for a concurrent request
+    to insert the same name in between.
+
     Args:
         db: The database session.
         tag: The Pydantic schema for the tag to create.
 
     Returns:
-        The newly created Tag object.
+        The newly created tag, or None if a tag with the same name already
+        exists.
+    """
+    global tag_cache
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = (
+            insert(models.Tag)
+            .values(name=tag.name)
+            .on_conflict_do_nothing(index_elements=[models.Tag.name])
+            .returning(models.Tag.id, models.Tag.name)
+        )
+        db_tag = db.execute(stmt).first()
+        db.commit()
+        if db_tag is None:
+            return None
+    else:
+        db_tag = models.Tag(name=tag.name)
+        db.add(db_tag)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
+
+    tag_cache = None
+    return schemas.Tag(id=db_tag.id, name=db_tag.name)
+
+def task_tags_query():
+    """
+    Builds the Core query selecting (task_id, tag id, tag name) for every
+    task-tag association.
+    """
+    return select(
+        models.task_tag_association.c.task_id, models.Tag.id, models.Tag.name
+    ).join(models.Tag, models.Tag.id == models.task_tag_association.c.tag_id)
+
+def group_tags_by_task(rows: List[Row]) -> Dict[str, List[schemas.Tag]]:
+    """
+    Groups (task_id, tag id, tag name) rows into Tag schemas per task,
+    bypassing the ORM.
+    """
+    tag_map: Dict[str, List[schemas.Tag]] = defaultdict(list)
+    for task_id, tag_id, name in rows:
+        tag_map[task_id].append(schemas.Tag.model_construct(id=tag_id, name=name))
+    return dict(tag_map)
+
+def get_tags_for_tasks(db: Session, task_ids: List[str]) -> Dict[str, List[schemas.Tag]]:
+    """
+    Retrieves the tags for several task IDs in a single query.
+
+    Args:
+        db: The database session.
+        task_ids: The IDs of the tasks.
+
+    Returns:
+        A dict mapping each task ID to its list of Tag schemas. Tasks without
+        tags are absent from the dict.
     """
-    db_tag = models.Tag(name=tag.name)
-    db.add(db_tag)
-    db.commit()
-    db.refresh(db_tag)
-    return db_tag
+    if not task_ids:
+        return {}
+    rows = db.execute(
+        task_tags_query().where(models.task_tag_association.c.task_id.in_(task_ids))
+    ).all()
+    return group_tags_by_task(rows)
 
-def get_tags_for_task(db: Session, task_id: str) -> List[models.Tag]:
+def get_all_task_tags(db: Session) -> Dict[str, List[schemas.Tag]] | None:
     """
-    Retrieves all tags associated with a specific task ID.
+    Retrieves the tags of every task that has any, using the tag cache when
+    it is fresh.
+
+    The whole association table is read in a single Core join. Because the
+    query does not depend on which tasks Google returns, it can run while
+    the Google request is still in flight. Tables too large to snapshot
+    (more than TAG_CACHE_MAXSIZE associations) are not loaded; use
+    `get_tags_for_tasks` for those.
 
     Args:
         db: The database session.
-        task_id: The ID of the task.
 
     Returns:
-        A list of Tag objects associated with the task.
+        A dict mapping each tagged task ID to its list of Tag schemas, or None
+        if the association table is too large to snapshot. Tasks without
+        tags are absent from the dict.
     """
-    return (
-        db.query(models.Tag)
-        .join(models.task_tag_association)
-        .filter(models.task_tag_association.c.task_id == task_id)
-        .all()
-    )
+    global tag_cache
+    now = time.monotonic()
+    if tag_cache is not None and tag_cache[0] > now:
+        return tag_cache[1]
+
+    rows = db.execute(task_tags_query().limit(TAG_CACHE_MAXSIZE + 1)).all()
+    tag_map = group_tags_by_task(rows) if len(rows) <= TAG_CACHE_MAXSIZE else None
+    tag_cache = (now + TAG_CACHE_TTL, tag_map)
+    return tag_map
@@ -1,12 +1,30 @@
+import os
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app.db")
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    # SQLite connections are cheap and local; an in-memory database must share
+    # a single connection or each session would see an empty database.
+    engine_options = {"connect_args": {"check_same_thread": False}}
+    if SQLALCHEMY_DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+        engine_options["poolclass"] = StaticPool
+else:
+    # Size the pool for concurrent requests and drop stale connections
+    # before handing them out.
+    engine_options = {
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -4,11 +4,17 @@ Main application file for the FastAPI backend.
 This file initializes the FastAPI application, creates the database tables,
 and defines the API endpoints.
 """
+import asyncio
+import hashlib
 import httpx
-from fastapi import FastAPI, Depends, HTTPException, status, Security
+import orjson
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
 
 from . import crud, models, schemas
 from .database import SessionLocal, engine
@@ -16,14 +22,60 @@ from .database import SessionLocal, engine
 # Create all database tables on startup
 models.Base.metadata.create_all(bind=engine)
 
+# --- Security Scheme ---
+bearer_scheme = HTTPBearer()
+
+# --- Google API ---
+GOOGLE_API_BASE_URL = "https://www.googleapis.com"
+GOOGLE_USERINFO_URL = "/oauth2/v3/userinfo"
+GOOGLE_TASKS_URL = "/tasks/v1/lists/@default/tasks"
+# Only request the fields GoogleTask reads, in pages as large as Google allows
+GOOGLE_TASKS_PARAMS = {
+    "fields": "items(id,title,status,due,notes),nextPageToken",
+    "maxResults": "100",
+}
+
+def create_google_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """
+    Creates the HTTP client used to talk to Google's APIs.
+
+    Args:
+        transport: An optional transport to send requests through instead of
+            the network, e.g. a mock transport in tests.
+
+    Returns:
+        A new HTTP client with pooled, kept-alive connections.
+    """
+    return httpx.AsyncClient(
+        base_url=GOOGLE_API_BASE_URL,
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        transport=transport,
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manages resources that live for the whole application lifetime.
+
+    A single HTTP client is shared by all requests so that connections to
+    Google's APIs are pooled and kept alive instead of being re-established
+    on every call.
+    """
+    app.state.http = create_google_client()
+    yield
+    await app.state.http.aclose()
+
 app = FastAPI(
     title="Domino Tasks API",
     description="Backend services for the Domino Tasks application.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
-# --- Security Scheme ---
-bearer_scheme = HTTPBearer()
+# --- Validators ---
+# Validates a whole list of enriched tasks in one call into pydantic-core.
+task_list_adapter = TypeAdapter(List[schemas.Task])
 
 # --- Dependencies ---
 
@@ -40,191 +92,80 @@ def get_db():
     finally:
         db.close()
 
-# --- API Endpoints ---
+# --- Google API Helpers ---
 
-@app.post("/auth/google", response_model=schemas.UserInfo)
-async def authenticate_google(token_data: schemas.TokenData):
+def google_auth_headers(token: str) -> Dict[str, str]:
     """
-    Authenticates a user by validating a Google access token.
-
-    This endpoint acts as a proxy to Google's userinfo endpoint. It takes an
-    access token, sends it to Google for validation, and returns the user's
-    information if the token is valid.
+    Builds the headers that authenticate a request to Google's APIs.
 
     Args:
-        token_data: A Pydantic model containing the Google access_token.
-
-    Raises:
-        HTTPException: 401 Unauthorized if the token is invalid or expired.
-        HTTPException: 400 Bad Request if the request to Google fails.
+        token: The Google access token.
 
     Returns:
-        The user's information (email, name, picture).
+        A new headers dict carrying the bearer token.
     """
-    google_userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-    headers = {"Authorization": f"Bearer {token_data.access_token}"}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(google_userinfo_url, headers=headers)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            user_data = response.json()
-            return schemas.UserInfo(**user_data)
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired Google token.",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch user info from Google: {e.response.text}"
-                )
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"An error occurred while requesting user info from Google: {e}"
-            )
-
-@app.get("/tasks", response_model=List[schemas.Task])
-async def get_tasks(
-    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-    db: Session = Depends(get_db)
-):
-    """
-    Retrieves tasks from the user's default Google Tasks list and enriches
-    them with locally stored tags.
-
-    Args:
-        credentials: The bearer token credentials handled by FastAPI's security scheme.
-        db: The database session dependency.
-
-    Raises:
-        HTTPException: 401 if the token is invalid or missing.
-        HTTPException: 400 if the request to Google fails.
-
-    Returns:
-        A list of tasks, each enriched with its associated tags.
-    """
-    token = credentials.token
-    google_tasks_url = "https://www.googleapis.com/tasks/v1/lists/@default/tasks"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    enriched_tasks = []
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(google_tasks_url, headers=headers)
-            response.raise_for_status()
-            google_tasks_data = response.json().get("items", [])
-            
-            for task_data in google_tasks_data:
-                # Validate and parse Google Task data
-                google_task = schemas.GoogleTask.model_validate(task_data)
-                
-                # Get local tags for the task
-                local_tags = crud.get_tags_for_task(db, task_id=google_task.id)
-                
-                # Create the enriched task object
-                enriched_task = schemas.Task(**google_task.model_dump(), tags=local_tags)
-                enriched_tasks.append(enriched_task)
-                
-            return enriched_tasks
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired Google token.",
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch tasks from Google: {e.response.text}"
-                )
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"An error occurred while requesting tasks from Google: {e}"
-            )
-
-
-@app.post("/tags/", response_model=schemas.Tag)
-def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
+    return {"Authorization": "Bearer " + token}
+
+# Last response seen per (token, URL, params): the ETag and the parsed JSON body.
+# Entries are keyed by a hash so raw access tokens are never held as keys.
+GOOGLE_CACHE_MAXSIZE = 1_000
+google_response_cache: Dict[str, Tuple[str, Any]] = {}
+
+async def fetch_google_json(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, str]] = None
+) -> Any:
     """
-    Creates a new tag in the database.
+    Performs a GET against a Google API and returns the decoded JSON body.
 
-    Checks if a tag with the same name already exists before creating.
+    If a previous response for the same token and URL carried an ETag, it is
+    sent back as `If-None-Match`; a 304 Not Modified then reuses the cached
+    body without downloading or parsing it again.
 
     Args:
-        tag: The tag data for creation.
-        db: The database session dependency.
+        client: The shared HTTP client.
+        url: The Google API path to request.
+        headers: The request headers, including the Authorization header.
+        params: Optional query string parameters.
 
     Raises:
-        HTTPException: 400 Bad Request if the tag name already exists.
+        httpx.HTTPStatusError: If Google responds with an error status.
+        httpx.RequestError: If the request could not be sent.
 
     Returns:
-        The newly created tag.
+        The decoded JSON body.
     """
-    db_tag = crud.get_tag_by_name(db, name=tag.name)
-    if db_tag:
-        raise HTTPException(status_code=400, detail="Tag already registered")
-    return crud.create_tag(db=db, tag=tag)
-
-@app.get("/tags/", response_model=List[schemas.Tag])
-def read_tags(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """
-    Retrieves a list of tags from the database.
-
-    Args:
-        skip: The number of records to skip (for pagination).
-        limit: The maximum number of records to return.
-        db: The database session dependency.
-
-    Returns:
-        A list of tags.
-    """
-    tags = crud.get_tags(db, skip=skip, limit=limit)
-    return tags
-
-import httpx
-from fastapi import FastAPI, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
-from typing import List, Annotated
-
-from . import crud, models, schemas
-from .database import SessionLocal, engine
-
-# Create all database tables on startup
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="Domino Tasks API",
-    description="Backend services for the Domino Tasks application.",
-    version="0.1.0"
-)
-
-# --- Dependencies ---
-
-def get_db():
-    """
-    Dependency that provides a database session for each request.
-
-    Yields:
-        Session: The SQLAlchemy database session.
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    key = hashlib.sha256(f"{headers['Authorization']} {url} {params}".encode()).hexdigest()
+    cached = google_response_cache.get(key)
+    if cached is not None:
+        headers = {**headers, "If-None-Match": cached[0]}
+
+    # Stream the body into a single buffer and decode it with orjson, skipping
+    # httpx's intermediate text decode.
+    async with client.stream("GET", url, headers=headers, params=params) as response:
+        if response.status_code == status.HTTP_304_NOT_MODIFIED and cached is not None:
+            return cached[1]
+        if not response.is_success:
+            await response.aread()  # Make the error body available to callers
+        response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+    data = orjson.loads(body)
+
+    etag = response.headers.get("ETag")
+    if etag:
+        if len(google_response_cache) >= GOOGLE_CACHE_MAXSIZE:
+            google_response_cache.clear()
+        google_response_cache[key] = (etag, data)
+    return data
 
 # --- API Endpoints ---
 
 @app.post("/auth/google", response_model=schemas.UserInfo)
-async def authenticate_google(token_data: schemas.TokenData):
+async def authenticate_google(token_data: schemas.TokenData, request: Request):
     """
     Authenticates a user by validating a Google access token.
 
@@ -234,6 +175,7 @@ async def authenticate_google(token_data: schemas.TokenData):
 
     Args:
         token_data: A Pydantic model containing the Google access_token.
+        request: The incoming request, used to reach the shared HTTP client.
 
     Raises:
         HTTPException: 401 Unauthorized if the token is invalid or expired.
@@ -242,36 +184,34 @@ async def authenticate_google(token_data: schemas.TokenData):
     Returns:
         The user's information (email, name, picture).
     """
-    google_userinfo_url = "https://www.googleapis.com/oauth2/v3/userinfo"
-    headers = {"Authorization": f"Bearer {token_data.access_token}"}
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(google_userinfo_url, headers=headers)
-            response.raise_for_status()  # Raise an exception for 4xx or 5xx status codes
-            user_data = response.json()
-            return schemas.UserInfo(**user_data)
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired Google token.",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch user info from Google: {e.response.text}"
-                )
-        except httpx.RequestError as e:
+    headers = google_auth_headers(token_data.access_token)
+
+    client = request.app.state.http
+    try:
+        user_data = await fetch_google_json(client, GOOGLE_USERINFO_URL, headers)
+        return schemas.UserInfo(**user_data)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired Google token.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"An error occurred while requesting user info from Google: {e}"
+                detail=f"Failed to fetch user info from Google: {e.response.text}"
             )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An error occurred while requesting user info from Google: {e}"
+        )
 
 @app.get("/tasks", response_model=List[schemas.Task])
 async def get_tasks(
-    authorization: Annotated[str, Header()],
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
     db: Session = Depends(get_db)
 ):
     """
@@ -279,7 +219,8 @@ async def get_tasks(
     them with locally stored tags.
 
     Args:
-        authorization: The 'Bearer <token>' authorization header.
+        request: The incoming request, used to reach the shared HTTP client.
+        credentials: The bearer token credentials handled by FastAPI's security scheme.
         db: The database session dependency.
 
     Raises:
@@ -289,53 +230,54 @@ async def get_tasks(
     Returns:
         A list of tasks, each enriched with its associated tags.
     """
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization scheme."
+    headers = google_auth_headers(credentials.credentials)
+
+    client = request.app.state.http
+
+    # Start loading local tags while Google is being queried
+    tags_prefetch = asyncio.create_task(run_in_threadpool(crud.get_all_task_tags, db))
+    try:
+        google_tasks_data = []
+        params = GOOGLE_TASKS_PARAMS
+        while True:
+            page = await fetch_google_json(client, GOOGLE_TASKS_URL, headers, params)
+            google_tasks_data.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+            params = {**GOOGLE_TASKS_PARAMS, "pageToken": page_token}
+
+        tag_map = await tags_prefetch
+        if tag_map is None:
+            # Too many associations to snapshot; look up only these tasks
+            task_ids = [task_data["id"] for task_data in google_tasks_data]
+            tag_map = await run_in_threadpool(crud.get_tags_for_tasks, db, task_ids=task_ids)
+
+        # Validate all Google Task data and local tags in a single pass
+        return task_list_adapter.validate_python(
+            [{**task_data, "tags": tag_map.get(task_data["id"], [])} for task_data in google_tasks_data],
+            from_attributes=True,
         )
-    token = authorization.split(" ")[1]
-    
-    google_tasks_url = "https://www.googleapis.com/tasks/v1/lists/@default/tasks"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    enriched_tasks = []
-
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(google_tasks_url, headers=headers)
-            response.raise_for_status()
-            google_tasks_data = response.json().get("items", [])
-            
-            for task_data in google_tasks_data:
-                # Validate and parse Google Task data
-                google_task = schemas.GoogleTask.model_validate(task_data)
-                
-                # Get local tags for the task
-                local_tags = crud.get_tags_for_task(db, task_id=google_task.id)
-                
-                # Create the enriched task object
-                enriched_task = schemas.Task(**google_task.model_dump(), tags=local_tags)
-                enriched_tasks.append(enriched_task)
-                
-            return enriched_tasks
-
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid or expired Google token.",
-                )
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to fetch tasks from Google: {e.response.text}"
-                )
-        except httpx.RequestError as e:
+
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 401:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired Google token.",
+            )
+        else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"An error occurred while requesting tasks from Google: {e}"
+                detail=f"Failed to fetch tasks from Google: {e.response.text}"
             )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An error occurred while requesting tasks from Google: {e}"
+        )
+    finally:
+        # The session must not be closed while the prefetch is still using it
+        await asyncio.gather(tags_prefetch, return_exceptions=True)
 
 
 @app.post("/tags/", response_model=schemas.Tag)
@@ -343,7 +285,7 @@ def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
     """
     Creates a new tag in the database.
 
-    Checks if a tag with the same name already exists before creating.
+    The insert is skipped if a tag with the same name already exists.
 
     Args:
         tag: The tag data for creation.
@@ -355,10 +297,10 @@ def create_tag(tag: schemas.TagCreate, db: Session = Depends(get_db)):
     Returns:
         The newly created tag.
     """
-    db_tag = crud.get_tag_by_name(db, name=tag.name)
-    if db_tag:
+    db_tag = crud.create_tag(db=db, tag=tag)
+    if db_tag is None:
         raise HTTPException(status_code=400, detail="Tag already registered")
-    return crud.create_tag(db=db, tag=tag)
+    return db_tag
 
 @app.get("/tags/", response_model=List[schemas.Tag])
 def read_tags(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
@@ -374,4 +316,4 @@ def read_tags(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
         A list of tags.
     """
     tags = crud.get_tags(db, skip=skip, limit=limit)
-    return tags
\ No newline at end of file
+    return tags
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -8,6 +8,11 @@ task_tag_association = Table('task_tags', Base.metadata,
     Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
 )
 
+# Índices explícitos para buscar las etiquetas de una tarea y, a la inversa,
+# las tareas de una etiqueta.
+Index('ix_task_tags_task_id', task_tag_association.c.task_id)
+Index('ix_task_tags_tag_id', task_tag_association.c.tag_id)
+
 class Tag(Base):
     __tablename__ = 'tags'
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,82 @@
+"""
+Shared fixtures for the backend tests.
+
+The tests run against their own in-memory SQLite database and a mocked Google
+API, so they never touch a configured database or the network.
+"""
+import os
+
+# Set before the application is imported, so even the table creation done at
+# import time can never reach a configured database.
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import crud, main, models
+
+test_engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+class FakeGoogle:
+    """Stands in for Google's APIs: records requests and replays queued responses."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created test database, with an empty tag cache."""
+    models.Base.metadata.create_all(bind=test_engine)
+    crud.tag_cache = None
+    session = TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        crud.tag_cache = None
+        models.Base.metadata.drop_all(bind=test_engine)
+
+
+@pytest.fixture
+def google():
+    """The fake Google API the application's HTTP client talks to."""
+    return FakeGoogle()
+
+
+@pytest.fixture
+def client(db, google, monkeypatch):
+    """A test client wired to the test database and the fake Google API."""
+    def get_test_db():
+        session = TestSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    create_google_client = main.create_google_client
+    monkeypatch.setattr(
+        main,
+        "create_google_client",
+        lambda: create_google_client(transport=httpx.MockTransport(google)),
+    )
+    monkeypatch.setattr(main, "google_response_cache", {})
+    main.app.dependency_overrides[main.get_db] = get_test_db
+    try:
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        main.app.dependency_overrides.clear()
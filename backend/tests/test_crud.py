@@ -0,0 +1,88 @@
+"""
+Tests for the CRUD operations.
+"""
+import pytest
+
+from backend import crud, models, schemas
+
+
+def add_task_tag(db, task_id, tag_id, name):
+    """Stores a tag and attaches it to a task."""
+    db.execute(models.Tag.__table__.insert().values(id=tag_id, name=name))
+    db.execute(models.task_tag_association.insert().values(task_id=task_id, tag_id=tag_id))
+    db.commit()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clock used by the tag cache with one the test can advance."""
+    now = [1000.0]
+    monkeypatch.setattr(crud.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["sqlite", "other"])
+def dialect_db(request, db, monkeypatch):
+    """A session that takes either the ON CONFLICT path or the generic fallback."""
+    if request.param == "other":
+        monkeypatch.setattr(db.get_bind().dialect, "name", "mysql")
+    return db
+
+
+def test_create_tag_returns_tag_schema(dialect_db):
+    tag = crud.create_tag(dialect_db, schemas.TagCreate(name="work"))
+
+    assert isinstance(tag, schemas.Tag)
+    assert tag.name == "work"
+    assert tag.id is not None
+
+
+def test_create_tag_returns_none_for_duplicate_name(dialect_db):
+    first = crud.create_tag(dialect_db, schemas.TagCreate(name="work"))
+
+    assert crud.create_tag(dialect_db, schemas.TagCreate(name="work")) is None
+    # The session is still usable after the conflict
+    assert [row.name for row in crud.get_tags(dialect_db)] == [first.name]
+
+
+def test_get_tags_for_tasks_only_returns_requested_tasks(db):
+    add_task_tag(db, "task-1", 1, "home")
+    add_task_tag(db, "task-2", 2, "work")
+
+    tag_map = crud.get_tags_for_tasks(db, ["task-1", "task-3"])
+
+    assert tag_map == {"task-1": [schemas.Tag(id=1, name="home")]}
+
+
+def test_all_task_tags_snapshot_expires_after_ttl(db, clock):
+    add_task_tag(db, "task-1", 1, "home")
+    assert crud.get_all_task_tags(db) == {"task-1": [schemas.Tag(id=1, name="home")]}
+
+    add_task_tag(db, "task-2", 2, "work")
+    clock[0] += crud.TAG_CACHE_TTL - 1
+    assert "task-2" not in crud.get_all_task_tags(db)
+
+    clock[0] += 1
+    assert crud.get_all_task_tags(db)["task-2"] == [schemas.Tag(id=2, name="work")]
+
+
+def test_create_tag_invalidates_tag_cache(db, clock):
+    add_task_tag(db, "task-1", 1, "home")
+    crud.get_all_task_tags(db)
+    assert crud.tag_cache is not None
+
+    work = crud.create_tag(db, schemas.TagCreate(name="work"))
+    db.execute(models.task_tag_association.insert().values(task_id="task-1", tag_id=work.id))
+    db.commit()
+
+    # The clock has not moved, so only invalidation can make the new tag visible
+    assert crud.get_all_task_tags(db)["task-1"] == [schemas.Tag(id=1, name="home"), work]
+
+
+def test_all_task_tags_not_snapshotted_when_too_large(db, monkeypatch):
+    monkeypatch.setattr(crud, "TAG_CACHE_MAXSIZE", 1)
+    add_task_tag(db, "task-1", 1, "home")
+    add_task_tag(db, "task-2", 2, "work")
+
+    assert crud.get_all_task_tags(db) is None
+    assert crud.tag_cache[1] is None
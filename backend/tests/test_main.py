@@ -0,0 +1,153 @@
+"""
+Tests for the API endpoints.
+"""
+import httpx
+import pytest
+
+from backend import crud, main, models
+
+GOOGLE_TASKS = {
+    "items": [
+        {"id": "task-1", "title": "Buy milk", "status": "needsAction"},
+        {"id": "task-2", "title": "Write report", "status": "completed", "notes": "Q3"},
+    ]
+}
+
+USER_INFO = {"email": "ada@example.com", "name": "Ada", "picture": None}
+
+
+@pytest.fixture
+def tagged_task(db):
+    """Stores a tag attached to task-1."""
+    db.execute(models.Tag.__table__.insert().values(id=1, name="home"))
+    db.execute(models.task_tag_association.insert().values(task_id="task-1", tag_id=1))
+    db.commit()
+
+
+def test_get_tasks_enriches_google_tasks_with_tags(client, google, tagged_task):
+    google.responses.append(httpx.Response(200, json=GOOGLE_TASKS))
+
+    response = client.get("/tasks", headers={"Authorization": "Bearer good-token"})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "id": "task-1",
+            "title": "Buy milk",
+            "status": "needsAction",
+            "due": None,
+            "notes": None,
+            "tags": [{"id": 1, "name": "home"}],
+        },
+        {
+            "id": "task-2",
+            "title": "Write report",
+            "status": "completed",
+            "due": None,
+            "notes": "Q3",
+            "tags": [],
+        },
+    ]
+    assert len(google.requests) == 1
+    assert google.requests[0].url.path == "/tasks/v1/lists/@default/tasks"
+    assert google.requests[0].headers["Authorization"] == "Bearer good-token"
+
+
+def test_get_tasks_falls_back_to_scoped_query_when_snapshot_too_large(
+    client, google, tagged_task, monkeypatch
+):
+    monkeypatch.setattr(crud, "TAG_CACHE_MAXSIZE", 0)
+    google.responses.append(httpx.Response(200, json=GOOGLE_TASKS))
+
+    response = client.get("/tasks", headers={"Authorization": "Bearer good-token"})
+
+    assert response.status_code == 200
+    assert [task["tags"] for task in response.json()] == [[{"id": 1, "name": "home"}], []]
+
+
+def test_get_tasks_follows_next_page_token(client, google):
+    first_page, second_page = GOOGLE_TASKS["items"]
+    google.responses.append(
+        httpx.Response(200, json={"items": [first_page], "nextPageToken": "page-2"})
+    )
+    google.responses.append(httpx.Response(200, json={"items": [second_page]}))
+
+    response = client.get("/tasks", headers={"Authorization": "Bearer good-token"})
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == ["task-1", "task-2"]
+    assert len(google.requests) == 2
+    assert "pageToken" not in google.requests[0].url.params
+    assert google.requests[1].url.params["pageToken"] == "page-2"
+    for request in google.requests:
+        assert request.url.params["fields"] == "items(id,title,status,due,notes),nextPageToken"
+        assert request.url.params["maxResults"] == "100"
+
+
+def test_get_tasks_rejects_invalid_google_token(client, google):
+    google.responses.append(httpx.Response(401, json={"error": "invalid_token"}))
+
+    response = client.get("/tasks", headers={"Authorization": "Bearer bad-token"})
+
+    assert response.status_code == 401
+
+
+def test_create_tag_rejects_duplicate_name(client):
+    response = client.post("/tags/", json={"name": "work"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "work"
+
+    response = client.post("/tags/", json={"name": "work"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Tag already registered"}
+
+
+def test_google_request_revalidates_with_etag(client, google):
+    google.responses.append(httpx.Response(200, json=USER_INFO, headers={"ETag": '"v1"'}))
+    google.responses.append(httpx.Response(200, json=USER_INFO, headers={"ETag": '"v2"'}))
+
+    client.post("/auth/google", json={"access_token": "good-token"})
+    client.post("/auth/google", json={"access_token": "good-token"})
+
+    assert "If-None-Match" not in google.requests[0].headers
+    assert google.requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_google_not_modified_returns_cached_body(client, google):
+    google.responses.append(httpx.Response(200, json=USER_INFO, headers={"ETag": '"v1"'}))
+    google.responses.append(httpx.Response(304))
+
+    first = client.post("/auth/google", json={"access_token": "good-token"})
+    second = client.post("/auth/google", json={"access_token": "good-token"})
+
+    assert second.status_code == 200
+    assert second.json() == first.json() == USER_INFO
+
+
+def test_google_response_cache_is_bounded(client, google, monkeypatch):
+    monkeypatch.setattr(main, "GOOGLE_CACHE_MAXSIZE", 1)
+    google.responses.append(httpx.Response(200, json=USER_INFO, headers={"ETag": '"a"'}))
+    google.responses.append(httpx.Response(200, json=USER_INFO, headers={"ETag": '"b"'}))
+
+    client.post("/auth/google", json={"access_token": "token-a"})
+    client.post("/auth/google", json={"access_token": "token-b"})
+
+    assert [etag for etag, _ in main.google_response_cache.values()] == ['"b"']
+
+
+def test_google_unauthorized_maps_to_401(client, google):
+    google.responses.append(httpx.Response(401, json={"error": "invalid_token"}))
+
+    response = client.post("/auth/google", json={"access_token": "bad-token"})
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid or expired Google token."}
+
+
+def test_google_error_maps_to_400_with_google_error_text(client, google):
+    google.responses.append(httpx.Response(503, text="Backend Error"))
+
+    response = client.post("/auth/google", json={"access_token": "good-token"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Failed to fetch user info from Google: Backend Error"}